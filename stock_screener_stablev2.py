@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import threading
 import yfinance as yf
 import pandas as pd
@@ -16,6 +16,13 @@ import logging
 import json
 import os
 import random
+import operator
+import csv
+import queue
+import sys
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
 
 
 logging.basicConfig(level=logging.INFO, 
@@ -23,6 +30,91 @@ logging.basicConfig(level=logging.INFO,
                     handlers=[logging.FileHandler("stock_screener.log"), 
                              logging.StreamHandler()])
 logger = logging.getLogger(__name__)
+# The module logger passes everything through; the file and console stay at
+# INFO and the GUI handler's own level decides what reaches the log view.
+logger.setLevel(logging.DEBUG)
+for handler in logging.getLogger().handlers:
+    handler.setLevel(logging.INFO)
+
+DEFAULT_QUARTER_HEADERS = [
+    "Q4/21-22", "Q1/22-23", "Q2/22-23", "Q3/22-23", "Q4/22-23",
+    "Q1/23-24", "Q2/23-24", "Q3/23-24", "Q4/23-24",
+    "Q1/24-25", "Q2/24-25", "Q3/24-25", "Q4/24-25"
+]
+
+SCREENER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+
+def screener_urls(symbol):
+    symbol = symbol.replace(".NS", "")
+    return [
+        f"https://www.screener.in/company/{symbol}/",
+        f"https://www.screener.in/company/{symbol}/consolidated/"
+    ]
+
+
+def clean_to_float(val):
+    try:
+        if val is None:
+            return None
+        return float(val.replace(',', '').replace('−', '-').replace('(', '-').replace(')', ''))
+    except:
+        return None
+
+
+def parse_quarterly_html(page, max_quarters=13):
+    """Parse the quarters table of a screener.in company page.
+    
+    Runs in a worker process, so it takes raw page bytes and returns only plain
+    data: None when there is no sales row, otherwise a dict with the quarter
+    headers and the sales, EPS and net profit values (None for a missing row).
+    """
+    soup = BeautifulSoup(page, 'html.parser')
+    section = soup.find('section', {'id': 'quarters'})
+    table = section.find('table') if section else None
+    if not table:
+        return None
+    
+    thead = table.find('thead')
+    headers = [th.text.strip() for th in thead.find_all('th')[1:max_quarters + 1]] if thead else []
+    
+    tbody = table.find('tbody')
+    rows = tbody.find_all('tr') if tbody else table.find_all('tr')
+    
+    sales_row = None
+    eps_row = None
+    net_profit_row = None
+    for row in rows:
+        cols = row.find_all('td')
+        if not cols:
+            continue
+        
+        label = cols[0].text.strip().lower()
+        if "sales" in label or "revenue" in label:
+            sales_row = cols[1:]
+        if "eps" in label and "in rs" in label:
+            eps_row = cols[1:]
+        if 'net' in label and 'profit' in label:
+            net_profit_row = cols[1:]
+    
+    if not sales_row:
+        return None
+    
+    def values(cols):
+        return [clean_to_float(col.text.strip()) for col in cols[:max_quarters]] if cols else None
+    
+    return {
+        "headers": headers,
+        "sales": values(sales_row),
+        "eps": values(eps_row),
+        "net_profit": values(net_profit_row)
+    }
 
 class StockScreenerApp:
     def __init__(self, root):
@@ -34,22 +126,34 @@ class StockScreenerApp:
         self.thread = None
         self.eod_snapshot_done = False
         self.last_quarterly_pe_update = None
-        self.quarterly_pe_data_cache = {}
-        self.quarter_headers = []
+        self.price_history_cache = {}
+        self.benchmark_history = None
+        self.indicator_config = {}
+        self.alert_config = {}
+        self.log_config = {}
+        self.pipeline_config = {}
+        self.session_local = threading.local()
         
         self.config_file = "stock_screener_config.json"
         if os.path.exists(self.config_file):
             with open(self.config_file, "r") as f:
                 config = json.load(f)
-                self.tickers = config.get("tickers", [])
+                self.data = ScreenerData(config.get("tickers", []))
+                self.indicator_config = config.get("indicators", {})
+                self.alert_config = config.get("alerts", {})
+                self.log_config = config.get("log", {})
+                self.pipeline_config = config.get("pipeline", {})
         else:
-            self.tickers = [
+            self.data = ScreenerData([
                 "ASIANPAINT.NS", "AARTIIND.NS", "PIDILITIND.NS", "HINDZINC.NS",
                 "BHARTIARTL.NS", "TATAMOTORS.NS", "HINDUNILVR.NS", "ITC.NS", 
                 "RELIANCE.NS", "HDFCBANK.NS", "INFY.NS", "TCS.NS"
-            ]
+            ])
             self.save_config()
         
+        self.indicator_engine = IndicatorEngine(self.indicator_config)
+        self.alert_engine = AlertEngine.from_config(self.alert_config, self.root)
+        
         self.create_widgets()
         
         self.sheet = None
@@ -72,6 +176,7 @@ class StockScreenerApp:
         self.start_button.pack(side=tk.LEFT, padx=5)
         
         ttk.Button(control_frame, text="Add Ticker", command=self.add_ticker).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Bulk Import", command=self.bulk_import).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="Save Config", command=self.save_config).pack(side=tk.LEFT, padx=5)
         
         ticker_frame = ttk.LabelFrame(main_frame, text="Tracked Tickers", padding="10")
@@ -95,6 +200,22 @@ class StockScreenerApp:
         log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
+        log_level_frame = ttk.Frame(log_frame)
+        log_level_frame.pack(fill=tk.X)
+        
+        log_levels = ["DEBUG", "INFO", "WARNING", "ERROR"]
+        log_level = str(self.log_config.get("level", "INFO")).upper()
+        if log_level not in log_levels:
+            logger.warning(f"Unknown log level in configuration: {self.log_config.get('level')}, using INFO")
+            log_level = "INFO"
+        
+        ttk.Label(log_level_frame, text="Level:").pack(side=tk.LEFT)
+        self.log_level_var = tk.StringVar(value=log_level)
+        log_level_box = ttk.Combobox(log_level_frame, textvariable=self.log_level_var, state="readonly", width=10,
+                                     values=log_levels)
+        log_level_box.pack(side=tk.LEFT, padx=5)
+        log_level_box.bind("<<ComboboxSelected>>", self.set_log_level)
+        
         log_scrollbar = ttk.Scrollbar(log_frame)
         log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
@@ -104,13 +225,20 @@ class StockScreenerApp:
         self.log_text.config(yscrollcommand=log_scrollbar.set)
         log_scrollbar.config(command=self.log_text.yview)
         
-        self.log_handler = TextHandler(self.log_text)
-        self.log_handler.setLevel(logging.INFO)
+        self.log_handler = TextHandler(self.log_text,
+                                       max_lines=self.log_config.get("max_lines", 1000),
+                                       flush_interval_ms=self.log_config.get("flush_interval_ms", 250))
+        self.log_handler.setLevel(self.log_level_var.get())
         logger.addHandler(self.log_handler)
     
+    def set_log_level(self, event=None):
+        level = self.log_level_var.get()
+        self.log_handler.setLevel(level)
+        self.log_config["level"] = level
+    
     def update_ticker_listbox(self):
         self.ticker_listbox.delete(0, tk.END)
-        for ticker in self.tickers:
+        for ticker in self.data.snapshot().tickers:
             self.ticker_listbox.insert(tk.END, ticker)
     
     def show_context_menu(self, event):
@@ -125,7 +253,7 @@ class StockScreenerApp:
         try:
             selected_index = self.ticker_listbox.curselection()[0]
             ticker = self.ticker_listbox.get(selected_index)
-            self.tickers.remove(ticker)
+            self.data.remove_ticker(ticker)
             self.update_ticker_listbox()
             self.save_config()
             logger.info(f"Removed ticker: {ticker}")
@@ -135,23 +263,144 @@ class StockScreenerApp:
     def add_ticker(self):
         ticker = simpledialog.askstring("Add Ticker", "Enter ticker symbol (e.g., INFY.NS):")
         if ticker:
+            self.import_tickers([ticker.strip()])
+    
+    def bulk_import(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Bulk Import")
+        dialog.geometry("400x350")
+        
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Paste symbols (comma, space or newline separated) or load a CSV:").pack(fill=tk.X)
+        
+        symbols_text = tk.Text(frame, height=12, wrap=tk.WORD)
+        symbols_text.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        def load_csv():
+            path = filedialog.askopenfilename(parent=dialog, filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+            if not path:
+                return
             try:
-                stock = yf.Ticker(ticker)
-                info = stock.info
-                if 'regularMarketPrice' not in info or info['regularMarketPrice'] is None:
-                    messagebox.showerror("Invalid Ticker", f"Could not validate ticker: {ticker}")
-                    return
-                
-                self.tickers.append(ticker)
-                self.update_ticker_listbox()
-                self.save_config()
-                logger.info(f"Added ticker: {ticker}")
+                symbols = self.read_symbols_csv(path)
+                symbols_text.insert(tk.END, "\n".join(symbols) + "\n")
+                logger.info(f"Loaded {len(symbols)} symbols from {path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to read {path}: {e}", parent=dialog)
+        
+        def do_import():
+            symbols = re.split(r"[\s,;]+", symbols_text.get("1.0", tk.END))
+            dialog.destroy()
+            self.import_tickers(symbols)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="Load CSV...", command=load_csv).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Import", command=do_import).pack(side=tk.RIGHT, padx=5)
+    
+    def read_symbols_csv(self, path):
+        """Read symbols from an index constituent CSV (uses the 'Symbol' column if present)"""
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.reader(f))
+        if not rows:
+            return []
+        
+        header = [cell.strip().lower() for cell in rows[0]]
+        if "symbol" in header:
+            column = header.index("symbol")
+            rows = rows[1:]
+        else:
+            column = 0
+        return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+    
+    def normalize_symbol(self, symbol):
+        symbol = symbol.strip().upper()
+        if symbol and "." not in symbol and not symbol.startswith("^"):
+            symbol += ".NS"
+        return symbol
+    
+    def import_tickers(self, symbols):
+        """Validate symbols off the UI thread, then add the valid ones and save the config once"""
+        tickers = self.data.snapshot().tickers
+        candidates = []
+        for symbol in symbols:
+            symbol = self.normalize_symbol(symbol)
+            if symbol and symbol not in tickers and symbol not in candidates:
+                candidates.append(symbol)
+        
+        if not candidates:
+            messagebox.showinfo("Import", "No new tickers to add.")
+            return
+        
+        self.status_var.set(f"Validating {len(candidates)} tickers...")
+        
+        def validate_threaded():
+            try:
+                valid = self.validate_tickers(candidates)
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to add ticker: {e}")
+                logger.error(f"Error validating tickers: {e}")
+                self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Failed to add tickers: {e}"))
+                return
+            self.root.after(0, lambda: self.finish_import(candidates, valid))
+        
+        threading.Thread(target=validate_threaded, daemon=True).start()
+    
+    def validate_tickers(self, symbols, batch_size=50, max_workers=4):
+        """Return the subset of symbols that have recent price history, checked in concurrent batches"""
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        
+        def check_batch(batch):
+            data = yf.download(batch, period="5d", group_by="ticker", progress=False, threads=False)
+            valid = set()
+            if data is None or data.empty:
+                return valid
+            for symbol in batch:
+                try:
+                    if isinstance(data.columns, pd.MultiIndex):
+                        closes = data[symbol]['Close']
+                    else:
+                        closes = data['Close']
+                except KeyError:
+                    continue
+                if closes.notna().any():
+                    valid.add(symbol)
+            return valid
+        
+        valid = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch_valid in executor.map(check_batch, batches):
+                valid |= batch_valid
+        return valid
+    
+    def finish_import(self, candidates, valid):
+        added = self.data.add_tickers([symbol for symbol in candidates if symbol in valid])
+        invalid = [symbol for symbol in candidates if symbol not in valid]
+        
+        if added:
+            self.update_ticker_listbox()
+            self.save_config()
+            logger.info(f"Added {len(added)} tickers: {', '.join(added)}")
+        
+        self.status_var.set(f"Added {len(added)} tickers")
+        
+        if invalid:
+            logger.warning(f"Could not validate {len(invalid)} tickers: {', '.join(invalid)}")
+            if len(candidates) == 1:
+                messagebox.showerror("Invalid Ticker", f"Could not validate ticker: {invalid[0]}")
+            else:
+                messagebox.showwarning("Import", f"Added {len(added)} tickers.\n\n"
+                                       f"Could not validate {len(invalid)} tickers:\n{', '.join(invalid)}")
     
     def save_config(self):
         try:
-            config = {"tickers": self.tickers}
+            config = {
+                "tickers": list(self.data.snapshot().tickers),
+                "indicators": self.indicator_config,
+                "alerts": self.alert_config,
+                "log": self.log_config,
+                "pipeline": self.pipeline_config
+            }
             with open(self.config_file, "w") as f:
                 json.dump(config, f)
             logger.info("Configuration saved")
@@ -272,214 +521,69 @@ class StockScreenerApp:
         
         return value
     
-    def clean_to_float(self, val):
-        try:
-            if val is None:
-                return None
-            return float(val.replace(',', '').replace('−', '-').replace('(', '-').replace(')', ''))
-        except:
-            return None
-    
-    def get_quarterly_data(self, symbol):
+    def fetch_quarterly_page(self, symbol, url_index):
+        """Fetch one screener.in page for symbol; returns the raw bytes, or None"""
+        url = screener_urls(symbol)[url_index]
+        
+        session = getattr(self.session_local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(SCREENER_HEADERS)
+            self.session_local.session = session
+        
         max_retries = 3
         retry_delay = 5 
         for attempt in range(max_retries):
             try:
-                symbol = symbol.replace(".NS", "")
-                
-                logger.info(f"Fetching Quarterly Data for {symbol}")
-                
-                urls = [
-                    f"https://www.screener.in/company/{symbol}/",
-                    f"https://www.screener.in/company/{symbol}/consolidated/"
-                ]
-                
-                sales_row = None
-                eps_row = None
-                net_profit_row = None   
-                
-                session = requests.Session()
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Accept-Encoding": "gzip, deflate, br",
-                    "Connection": "keep-alive",
-                    "Upgrade-Insecure-Requests": "1"
-                }
-                session.headers.update(headers)
-                
-                for url in urls:
-                    try:
-                        response = session.get(url, timeout=15)
-                        if response.status_code != 200:
-                            logger.warning(f"Failed to access {url}, status code: {response.status_code}")
-                            continue
-                        
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        section = soup.find('section', {'id': 'quarters'})
-                        if not section:
-                            logger.warning(f"No quarters section found at {url}")
-                            continue
-                        
-                        table = section.find('table')
-                        if not table:
-                            logger.warning(f"No table found in quarters section at {url}")
-                            continue
-                        
-                        tbody = table.find('tbody')
-                        rows = tbody.find_all('tr') if tbody else table.find_all('tr')
-                        
-                        if not rows:
-                            logger.warning(f"No rows found in table at {url}")
-                            continue
-                        
-                        for row in rows:
-                            cols = row.find_all('td')
-                            if not cols:
-                                continue
-                            
-                            if len(cols) > 0:
-                                label = cols[0].text.strip().lower()
-                                
-                                if "sales" in label or "revenue" in label:
-                                    sales_row = cols[1:]
-                                    logger.info(f"Found sales row with {len(sales_row)} columns")
-                                
-                                if "eps" in label and "in rs" in label:
-                                    eps_row = cols[1:]
-                                    logger.info(f"Found EPS row with {len(eps_row)} columns")
-
-                                if 'net' in label and 'profit' in label:
-                                    net_profit_row = cols[1:]
-                                    logger.info(f"Found net profit row with {len(net_profit_row)} columns")
-                        
-                        if sales_row:
-                            break
-                    
-                    except Exception as url_error:
-                        logger.error(f"Error processing URL {url}: {url_error}")
-                
-                if not sales_row:
-                    logger.error(f"Sales/Revenue row missing for {symbol}")
-                    return [], []
-                
-                if not eps_row:
-                    logger.warning(f"EPS row missing for {symbol}, filling zeros...")
-                    eps_row = [None] * len(sales_row)
-                
-                if not net_profit_row:
-                    logger.warning(f"Net Profit row missing for {symbol}, filling zeros...")
-                    net_profit_row = [None] * len(sales_row)
-                
-                sales = []
-                for col in sales_row[:13]:  
-                    try:
-                        val = self.clean_to_float(col.text.strip()) if col else None
-                        sales.append(val)
-                    except Exception as e:
-                        logger.warning(f"Error processing sales value: {e}")
-                        sales.append(None)
-                
-                eps = []
-                for col in eps_row[:13]:  
-                    try:
-                        val = self.clean_to_float(col.text.strip()) if col else 0.0
-                        eps.append(val)
-                    except Exception as e:
-                        logger.warning(f"Error processing EPS value: {e}")
-                        eps.append(0.0)
-
-                net_profit = []
-                for col in net_profit_row[:13]: 
-                    try:
-                        val = self.clean_to_float(col.text.strip()) if col else 0.0
-                        net_profit.append(val)
-                    except Exception as e:
-                        logger.warning(f"Error processing net profit value: {e}")
-                        net_profit.append(0.0)
-                
-                return eps, sales, net_profit
+                t.sleep(1 + random.random() * 2)
+                logger.debug(f"Fetching Quarterly Data for {symbol} from {url}")
+                response = session.get(url, timeout=15)
+                if response.status_code != 200:
+                    logger.warning(f"Failed to access {url}, status code: {response.status_code}")
+                    return None
+                return response.content
             except requests.exceptions.RequestException as e:
                 logger.warning(f"Request failed on attempt {attempt+1}/{max_retries}: {e}")
                 if attempt < max_retries - 1:
                     sleep_time = retry_delay * (2 ** attempt)
                     logger.info(f"Retrying in {sleep_time} seconds...")
                     t.sleep(sleep_time)
-                else:
-                    logger.error(f"Max retries reached for {symbol}")
-                    return [], [], []
-            
-            except Exception as e:
-                logger.error(f"Error scraping quarterly data for {symbol}: {e}")
-                return [], [], []
         
-    def get_quarterly_headers(self, symbol):
-        """Extract quarterly headers from screener.in"""
-        try:
-            symbol = symbol.replace(".NS", "")
-            logger.info(f"Fetching quarterly headers for {symbol}")
-            
-            urls = [
-                f"https://www.screener.in/company/{symbol}/",
-                f"https://www.screener.in/company/{symbol}/consolidated/"
-            ]
-            
-            headers = []
-            session = requests.Session()
-            session.headers.update({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1"
-            })
-            
-            for url in urls:
-                try:
-                    t.sleep(2 + random.random() * 3)
-                    
-                    response = session.get(url, timeout=15)
-                    if response.status_code != 200:
-                        logger.warning(f"Failed to access {url}, status code: {response.status_code}")
-                        continue
-                    
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    section = soup.find('section', {'id': 'quarters'})
-                    if not section:
-                        logger.warning(f"No quarters section found at {url}")
-                        continue
-                    
-                    table = section.find('table')
-                    if not table:
-                        logger.warning(f"No table found in quarters section at {url}")
-                        continue
-                    
-                    thead = table.find('thead')
-                    if not thead:
-                        logger.warning(f"No table header found in quarters section at {url}")
-                        continue
-                    
-                    th_elements = thead.find_all('th')
-                    if len(th_elements) <= 1:  
-                        logger.warning(f"No quarter headers found in table at {url}")
-                        continue
-                    
-                    headers = [th.text.strip() for th in th_elements[1:]]
-                    logger.info(f"Found {len(headers)} quarter headers: {headers}")
-                    
-                    if headers:
-                        break  
-                        
-                except Exception as url_error:
-                    logger.error(f"Error processing URL {url}: {url_error}")
-                    t.sleep(5)
-            
-            return headers
+        logger.error(f"Max retries reached for {symbol}")
+        return None
+    
+    def quarterly_values(self, symbol, parsed):
+        """Turn a parse_quarterly_html result into (eps, sales, net_profit) lists"""
+        sales = parsed["sales"]
+        logger.debug(f"Found sales row with {len(sales)} columns for {symbol}")
         
-        except Exception as e:
-            logger.error(f"Error extracting quarter headers for {symbol}: {e}")
-            return []
+        eps = parsed["eps"]
+        if eps is None:
+            logger.warning(f"EPS row missing for {symbol}, filling zeros...")
+            eps = [0.0] * len(sales)
         
+        net_profit = parsed["net_profit"]
+        if net_profit is None:
+            logger.warning(f"Net Profit row missing for {symbol}, filling zeros...")
+            net_profit = [0.0] * len(sales)
+        
+        return eps, sales, net_profit
+    
+    def get_quarterly_headers(self, symbol):
+        """Extract quarterly headers from screener.in"""
+        logger.debug(f"Fetching quarterly headers for {symbol}")
+        for url_index, url in enumerate(screener_urls(symbol)):
+            try:
+                page = self.fetch_quarterly_page(symbol, url_index)
+                parsed = parse_quarterly_html(page) if page else None
+                if parsed and parsed["headers"]:
+                    logger.debug(f"Found {len(parsed['headers'])} quarter headers: {parsed['headers']}")
+                    return parsed["headers"]
+                logger.warning(f"No quarter headers found at {url}")
+            except Exception as e:
+                logger.error(f"Error extracting quarter headers from {url}: {e}")
+        return []
+    
     def create_full_headers(self, quarter_headers):
         """Create full headers set based on extracted quarter headers"""
         basic_headers = [
@@ -498,18 +602,23 @@ class StockScreenerApp:
         
         profit_headers = [f"{quarter} Profit" for quarter in quarter_headers]
         
-        return basic_headers + price_change_headers + eps_headers + sales_headers + profit_headers
+        indicator_headers = self.indicator_engine.headers()
+        
+        return (basic_headers + price_change_headers + eps_headers + sales_headers + profit_headers
+                + indicator_headers)
     
     def get_price_changes(self, ticker):
         try:
             stock = yf.Ticker(ticker)
-            logger.info(f"Fetching price changes for {ticker}")
+            logger.debug(f"Fetching price changes for {ticker}")
             
             hist = stock.history(period="3y")
             
             if hist.empty:
                 return ['N/A'] * 8
             
+            self.price_history_cache[ticker] = hist
+            
             current_price = hist['Close'].iloc[-1]
                 
             price_changes = []
@@ -583,7 +692,7 @@ class StockScreenerApp:
             logging.error(f"Error calculating price changes for {ticker}: {e}")
             return ['N/A'] * 8
     
-    def get_financial_data(self, ticker):
+    def get_financial_data(self, ticker, snapshot):
         try:
             stock = yf.Ticker(ticker)
             info = stock.info
@@ -605,59 +714,128 @@ class StockScreenerApp:
             
             price_changes = self.get_price_changes(ticker)
             
-            if ticker in self.quarterly_pe_data_cache:
-                cached_data = self.quarterly_pe_data_cache[ticker]
-                eps_data = cached_data.get('eps_data', [])
-                sales_data = cached_data.get('sales_data', [])
-                net_profit_data = cached_data.get('net_profit_data', [])
-                
+            if ticker in snapshot.fundamentals:
+                quarterly_data = snapshot.fundamentals.row(ticker)
             else:
-                eps_data = ['N/A'] * 13
-                sales_data = ['N/A'] * 13
-                net_profit_data = ['N/A'] * 13
+                quarterly_data = ['N/A'] * (len(FundamentalsStore.METRICS) * len(snapshot.quarter_headers))
             
-            return basic_financials + price_changes + eps_data + sales_data + net_profit_data
+            return basic_financials + price_changes + quarterly_data
         
         except Exception as e:
             logging.error(f"Error fetching data for {ticker}: {e}")
             return [ticker] + ['N/A'] * 44
     
+    def get_benchmark_history(self, newest_date):
+        """Benchmark history; the full 3y download only happens when the newest trading date changes"""
+        benchmark = self.indicator_engine.config['benchmark']
+        cached = self.benchmark_history
+        
+        if cached is None or IndicatorEngine._last_date(cached) < newest_date:
+            hist = yf.Ticker(benchmark).history(period="3y")
+            if hist.empty:
+                logger.warning(f"No history for benchmark {benchmark}, skipping relative strength")
+                return None
+            self.benchmark_history = hist
+            return hist
+        
+        # Same trading day: refresh only the live last bar.
+        latest = yf.Ticker(benchmark).history(period="1d")
+        if not latest.empty and IndicatorEngine._last_date(latest) == IndicatorEngine._last_date(cached):
+            self.benchmark_history = pd.concat([cached.iloc[:-1], latest.iloc[-1:]])
+        return self.benchmark_history
+    
+    def append_indicators(self, data, base_width, tickers):
+        """Append technical indicator columns to each row from the cached price history"""
+        indicator_count = len(self.indicator_engine.headers())
+        try:
+            # Rebuilt from the current tickers, so removed tickers drop out of the cache.
+            histories = {}
+            for ticker in tickers:
+                if ticker in self.price_history_cache:
+                    histories[ticker] = self.price_history_cache[ticker]
+            self.price_history_cache = histories
+            
+            benchmark_hist = None
+            if histories:
+                newest = max(IndicatorEngine._last_date(hist) for hist in histories.values())
+                benchmark_hist = self.get_benchmark_history(newest)
+            
+            indicators = self.indicator_engine.update(histories, benchmark_hist)
+        except Exception as e:
+            logger.error(f"Error computing technical indicators: {e}")
+            indicators = pd.DataFrame()
+        
+        rows = []
+        for row in data:
+            ticker = row[0]
+            row = (list(row) + ['N/A'] * base_width)[:base_width]
+            if ticker in indicators.index:
+                values = [self.sanitize(value) for value in indicators.loc[ticker].tolist()]
+            else:
+                values = ['N/A'] * indicator_count
+            rows.append(row + values)
+        return rows
+    
+    def check_alerts(self, headers, data):
+        try:
+            watched = [(column, headers.index(column))
+                       for column in self.alert_engine.watched_columns() if column in headers]
+            alerts = []
+            for row in data:
+                values = {column: row[index] for column, index in watched}
+                alerts.extend(self.alert_engine.process(row[0], values))
+            if alerts:
+                logger.info(f"Fired {len(alerts)} alerts")
+                self.alert_engine.dispatch(alerts)
+        except Exception as e:
+            logger.error(f"Error evaluating alerts: {e}")
+    
     def update_quarterly_and_pe_data(self):
         india = pytz.timezone("Asia/Kolkata")
         now = datetime.now(india)
         logger.info(f"Running quarterly and PE data update at {now}")
         
-        self.quarter_headers = []
+        # Build the new quarterly data privately and publish it in one swap, so
+        # readers never see a half-refreshed cache or empty headers.
+        snapshot = self.data.snapshot()
         
-        for i, ticker in enumerate(self.tickers):
-            try:
-                if i == 0 or not self.quarter_headers:
-                    self.quarter_headers = self.get_quarterly_headers(ticker)
-                    if not self.quarter_headers:
-                        logger.warning("Failed to get quarter headers, using default")
-                        self.quarter_headers = [
-                            "Q4/21-22", "Q1/22-23", "Q2/22-23", "Q3/22-23", "Q4/22-23",
-                            "Q1/23-24", "Q2/23-24", "Q3/23-24", "Q4/23-24",
-                            "Q1/24-25", "Q2/24-25", "Q3/24-25", "Q4/24-25"
-                        ]
-                
-                if i > 0:
-                    t.sleep(1 + random.random() * 2)
-                    
-                eps_data, sales_data, net_profit_data = self.get_quarterly_data(ticker)
-                
-                self.quarterly_pe_data_cache[ticker] = {
-                    'eps_data': eps_data,
-                    'sales_data': sales_data,
-                    'net_profit_data': net_profit_data,
-                }
-                
-                logger.info(f"Updated quarterly and PE data for {ticker}")
-                
-                self.root.after(0, lambda: self.status_var.set(f"Updated: {ticker}"))
-                
-            except Exception as e:
-                logger.error(f"Error updating quarterly and PE data for {ticker}: {e}")
+        def on_result(ticker, parsed):
+            if parsed is None:
+                logger.error(f"Sales/Revenue row missing for {ticker}")
+                return
+            logger.debug(f"Updated quarterly and PE data for {ticker}")
+            self.root.after(0, lambda: self.status_var.set(f"Updated: {ticker}"))
+        
+        pipeline = QuarterlyPipeline(self.fetch_quarterly_page,
+                                     fetch_workers=self.pipeline_config.get("fetch_workers", 2),
+                                     parse_workers=self.pipeline_config.get("parse_workers"))
+        results = pipeline.run(snapshot.tickers, on_result)
+        
+        first = results.get(snapshot.tickers[0]) if snapshot.tickers else None
+        if first and first["headers"]:
+            quarter_headers = first["headers"]
+        else:
+            logger.warning("Failed to get quarter headers, using default")
+            quarter_headers = DEFAULT_QUARTER_HEADERS
+        
+        fundamentals = FundamentalsStore(snapshot.tickers, quarter_headers)
+        for ticker in snapshot.tickers:
+            parsed = results.get(ticker)
+            if parsed is not None:
+                eps_data, sales_data, net_profit_data = self.quarterly_values(ticker, parsed)
+                fundamentals.set(ticker, {
+                    'eps': eps_data,
+                    'sales': sales_data,
+                    'net_profit': net_profit_data
+                }, labels=parsed["headers"])
+            elif ticker in snapshot.fundamentals:
+                # Keep the previous figures when this refresh failed for the ticker.
+                previous = snapshot.fundamentals
+                fundamentals.set(ticker, {metric: previous.metric(ticker, metric) for metric in previous.METRICS},
+                                 labels=previous.quarters)
+        fundamentals.freeze()
+        
+        self.data.publish(quarter_headers=fundamentals.quarters, fundamentals=fundamentals)
         
         self.last_quarterly_pe_update = now
         logger.info("Quarterly and PE data update completed")
@@ -685,24 +863,23 @@ class StockScreenerApp:
             logging.info(f"Skipping update.")
             return
         
+        snapshot = self.data.snapshot()
+        if not snapshot.quarter_headers:
+            quarter_headers = self.get_quarterly_headers(snapshot.tickers[0]) if snapshot.tickers else []
+            snapshot = self.data.publish(quarter_headers=quarter_headers or DEFAULT_QUARTER_HEADERS)
+        
         data = []
-        for ticker in self.tickers:
-            row = self.get_financial_data(ticker)
+        for ticker in snapshot.tickers:
+            row = self.get_financial_data(ticker, snapshot)
             logging.info(f"Fetched data for {ticker}")
             self.root.after(0, lambda t=ticker: self.status_var.set(f"Updating: {t}"))
             data.append(row)
         
-            if not hasattr(self, 'quarter_headers') or not self.quarter_headers:
-                self.quarter_headers = self.get_quarterly_headers(self.tickers[0]) if self.tickers else []
-            
-            if not self.quarter_headers:
-                self.quarter_headers = [
-                    "Q4/21-22", "Q1/22-23", "Q2/22-23", "Q3/22-23", "Q4/22-23",
-                    "Q1/23-24", "Q2/23-24", "Q3/23-24", "Q4/23-24",
-                    "Q1/24-25", "Q2/24-25", "Q3/24-25", "Q4/24-25"
-                ]
+        headers = self.create_full_headers(snapshot.quarter_headers)
+        
+        data = self.append_indicators(data, len(headers) - len(self.indicator_engine.headers()), snapshot.tickers)
         
-        headers = self.create_full_headers(self.quarter_headers)
+        self.check_alerts(headers, data)
         
         percentage_columns_indices = {
             8: True,   
@@ -789,21 +966,820 @@ class StockScreenerApp:
 
 
 class TextHandler(logging.Handler):
-    def __init__(self, text_widget):
+    """Log handler for a Tk Text widget.
+    
+    Records are queued from any thread and written to the widget in one batch
+    per UI tick. Both the queue and the widget are capped at max_lines, so a
+    burst of records drops the oldest lines instead of growing without bound.
+    """
+    
+    def __init__(self, text_widget, max_lines=1000, flush_interval_ms=250):
         logging.Handler.__init__(self)
         self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.flush_interval_ms = flush_interval_ms
+        self.pending = deque(maxlen=max_lines)
+        self.pending_lock = threading.Lock()
+        self.text_widget.configure(state='disabled')
+        self.text_widget.after(self.flush_interval_ms, self.flush_to_widget)
     
     def emit(self, record):
-        msg = self.format(record)
-        def append():
-            self.text_widget.configure(state='normal')
-            self.text_widget.insert(tk.END, msg + '\n')
-            self.text_widget.configure(state='disabled')
-            self.text_widget.yview(tk.END)
-        self.text_widget.after(0, append)
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.pending_lock:
+            self.pending.append(msg)
+    
+    def flush_to_widget(self):
+        with self.pending_lock:
+            lines = list(self.pending)
+            self.pending.clear()
+        
+        try:
+            if lines:
+                self.text_widget.configure(state='normal')
+                self.text_widget.insert(tk.END, '\n'.join(lines) + '\n')
+                line_count = int(self.text_widget.index('end-1c').split('.')[0]) - 1
+                if line_count > self.max_lines:
+                    self.text_widget.delete('1.0', f'{line_count - self.max_lines + 1}.0')
+                self.text_widget.configure(state='disabled')
+                self.text_widget.yview(tk.END)
+            self.text_widget.after(self.flush_interval_ms, self.flush_to_widget)
+        except tk.TclError:
+            # The widget has been destroyed; stop ticking.
+            pass
+
+
+class FundamentalsStore:
+    """Quarterly fundamentals as one float64 (ticker x quarter x metric) array.
+    
+    Missing values are NaN, so the array doubles as its own mask. The quarter
+    axis is the sheet's quarter headers; each ticker's values are placed by
+    their own quarter labels. A store is filled once, frozen and then only
+    read, with rows sliced out as views.
+    """
+    
+    METRICS = ("eps", "sales", "net_profit")
+    
+    def __init__(self, tickers=(), quarters=()):
+        self.tickers = tuple(tickers)
+        self.quarters = tuple(quarters)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.quarter_index = {quarter: j for j, quarter in enumerate(self.quarters)}
+        self.metric_index = {metric: k for k, metric in enumerate(self.METRICS)}
+        self.values = np.full((len(self.tickers), len(self.quarters), len(self.METRICS)), np.nan)
+        self.present = np.zeros(len(self.tickers), dtype=bool)
+    
+    def __contains__(self, ticker):
+        i = self.ticker_index.get(ticker)
+        return i is not None and bool(self.present[i])
+    
+    @property
+    def mask(self):
+        """True where a value is missing"""
+        return np.isnan(self.values)
+    
+    def set(self, ticker, metrics, labels=None):
+        """Store {metric: values} for ticker, aligning values to the quarter axis by label"""
+        i = self.ticker_index[ticker]
+        for metric, values in metrics.items():
+            values = np.array([np.nan if value is None else value for value in values], dtype=float)
+            positions = self._positions(labels, len(values))
+            keep = positions >= 0
+            self.values[i, positions[keep], self.metric_index[metric]] = values[keep]
+        self.present[i] = True
+    
+    def _positions(self, labels, count):
+        if labels:
+            positions = np.array([self.quarter_index.get(label, -1) for label in list(labels)[:count]], dtype=int)
+            if len(positions) == count and (positions >= 0).any():
+                return positions
+        # Unknown or unmatched labels: fall back to position order.
+        positions = np.arange(count)
+        positions[positions >= len(self.quarters)] = -1
+        return positions
+    
+    def freeze(self):
+        self.values.flags.writeable = False
+        self.present.flags.writeable = False
+        return self
+    
+    def metric(self, ticker, metric):
+        """View of one metric across quarters for ticker"""
+        return self.values[self.ticker_index[ticker], :, self.metric_index[metric]]
+    
+    def row(self, ticker):
+        """Sheet cells for ticker: every quarter of each metric in METRICS order, 'N/A' for missing"""
+        # values[i].T is a (metric x quarter) view, so tolist() reads the array directly.
+        return ['N/A' if value != value else value
+                for metric_values in self.values[self.ticker_index[ticker]].T.tolist()
+                for value in metric_values]
+
+
+class ScreenerData:
+    """Shared tickers and quarterly fundamentals, published as immutable versioned snapshots.
+    
+    Readers call snapshot() once and use that object for the whole operation.
+    Writers never modify a published snapshot; they build the new state and
+    swap it in under the write lock, so readers need no locking at all.
+    """
+    
+    @dataclass(frozen=True)
+    class Snapshot:
+        version: int = 0
+        tickers: tuple = ()
+        quarter_headers: tuple = ()
+        fundamentals: "FundamentalsStore" = field(default_factory=lambda: FundamentalsStore().freeze())
+    
+    def __init__(self, tickers=()):
+        self._lock = threading.Lock()
+        self._snapshot = self.Snapshot(tickers=tuple(tickers))
+    
+    def snapshot(self):
+        return self._snapshot
+    
+    def publish(self, **changes):
+        """Swap in a new snapshot with the given fields replaced; returns it"""
+        with self._lock:
+            return self._swap(changes)
+    
+    def add_tickers(self, symbols):
+        """Append symbols not already tracked; returns the ones added"""
+        with self._lock:
+            added = []
+            for symbol in symbols:
+                if symbol not in self._snapshot.tickers and symbol not in added:
+                    added.append(symbol)
+            if added:
+                self._swap({"tickers": self._snapshot.tickers + tuple(added)})
+            return added
+    
+    def remove_ticker(self, ticker):
+        with self._lock:
+            tickers = self._snapshot.tickers
+            if ticker not in tickers:
+                raise ValueError(f"{ticker} is not tracked")
+            self._swap({"tickers": tuple(symbol for symbol in tickers if symbol != ticker)})
+    
+    def _swap(self, changes):
+        if "tickers" in changes:
+            changes["tickers"] = tuple(changes["tickers"])
+        if "quarter_headers" in changes:
+            changes["quarter_headers"] = tuple(changes["quarter_headers"])
+        self._snapshot = replace(self._snapshot, version=self._snapshot.version + 1, **changes)
+        return self._snapshot
+
+
+class QuarterlyPipeline:
+    """Fetches screener.in pages on I/O threads and parses them on a process pool.
+    
+    Fetched pages pass to the parse stage through a bounded queue and at most
+    two pages per parse worker are in flight, so fetchers block rather than
+    piling up HTML when parsing falls behind. A symbol whose standalone page has
+    no sales row is re-queued for its consolidated page.
+    
+    By default, watchlists smaller than PROCESS_POOL_MIN_SYMBOLS are parsed on a
+    single thread; larger ones get one process per core, up to one per symbol.
+    An explicit parse_workers overrides this; 0 always parses on a thread.
+    """
+    
+    PROCESS_POOL_MIN_SYMBOLS = 50
+    
+    def __init__(self, fetch_page, fetch_workers=2, parse_workers=None):
+        self.fetch_page = fetch_page
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = parse_workers
+    
+    def workers_for(self, symbol_count):
+        if self.parse_workers is not None:
+            return self.parse_workers
+        if symbol_count < self.PROCESS_POOL_MIN_SYMBOLS:
+            return 0
+        return min(os.cpu_count() or 1, symbol_count)
+    
+    def executor(self, workers):
+        if workers > 0:
+            try:
+                return ProcessPoolExecutor(max_workers=workers)
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Process pool unavailable, parsing on a thread: {e}")
+        return ThreadPoolExecutor(max_workers=1)
+    
+    def run(self, symbols, on_result=None):
+        """Fetch and parse all symbols; returns {symbol: parsed dict or None}"""
+        results = {}
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return results
+        
+        url_count = len(screener_urls(symbols[0]))
+        workers = self.workers_for(len(symbols))
+        in_flight = 2 * max(1, workers)
+        fetch_queue = queue.Queue()
+        parse_queue = queue.Queue(maxsize=in_flight)
+        done_queue = queue.Queue()
+        parse_slots = threading.BoundedSemaphore(in_flight)
+        stop = threading.Event()
+        
+        def fetch_stage():
+            while not stop.is_set():
+                job = fetch_queue.get()
+                if job is None or stop.is_set():
+                    return
+                symbol, url_index = job
+                try:
+                    page = self.fetch_page(symbol, url_index)
+                except Exception as e:
+                    logger.error(f"Error fetching quarterly data for {symbol}: {e}")
+                    page = None
+                while not stop.is_set():
+                    try:
+                        parse_queue.put((symbol, url_index, page), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        
+        def parse_stage(executor):
+            while True:
+                job = parse_queue.get()
+                if job is None:
+                    return
+                symbol, url_index, page = job
+                # After a stop, keep draining so no fetcher blocks, but parse nothing.
+                if page is None or stop.is_set():
+                    done_queue.put((symbol, url_index, None))
+                    continue
+                
+                parse_slots.acquire()
+                try:
+                    future = executor.submit(parse_quarterly_html, page)
+                except Exception as e:
+                    logger.error(f"Error submitting {symbol} for parsing: {e}")
+                    parse_slots.release()
+                    done_queue.put((symbol, url_index, None))
+                    continue
+                
+                def parsed(future, symbol=symbol, url_index=url_index):
+                    parse_slots.release()
+                    done_queue.put((symbol, url_index, future))
+                future.add_done_callback(parsed)
+        
+        for symbol in symbols:
+            fetch_queue.put((symbol, 0))
+        
+        executor = self.executor(workers)
+        fetchers = [threading.Thread(target=fetch_stage, daemon=True) for _ in range(self.fetch_workers)]
+        parser = threading.Thread(target=parse_stage, args=(executor,), daemon=True)
+        for thread in fetchers + [parser]:
+            thread.start()
+        
+        try:
+            remaining = len(symbols)
+            while remaining:
+                symbol, url_index, future = done_queue.get()
+                result = None
+                if future is not None:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Error parsing quarterly data for {symbol}: {e}")
+                
+                if result is None and url_index + 1 < url_count:
+                    logger.warning(f"No quarterly data at {screener_urls(symbol)[url_index]}")
+                    fetch_queue.put((symbol, url_index + 1))
+                    continue
+                
+                results[symbol] = result
+                remaining -= 1
+                if on_result:
+                    on_result(symbol, result)
+        finally:
+            # Stop fetching whatever is still queued (e.g. when on_result raised),
+            # wait for the fetchers, then for the parser, which drains until then.
+            stop.set()
+            for _ in fetchers:
+                fetch_queue.put(None)
+            for thread in fetchers:
+                thread.join()
+            parse_queue.put(None)
+            parser.join()
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        return results
+
+
+def benchmark_parsing(page_dir, max_workers=None, min_pages=200):
+    """Time parse_quarterly_html over recorded pages with 1..N worker processes"""
+    pages = []
+    for name in sorted(os.listdir(page_dir)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(page_dir, name), "rb") as f:
+                pages.append(f.read())
+    if not pages:
+        print(f"No .html pages found in {page_dir}")
+        return
+    
+    # Repeat small recordings so each run has enough work to spread across workers.
+    pages = pages * -(-min_pages // len(pages))
+    max_workers = max_workers or os.cpu_count() or 1
+    
+    worker_counts = sorted({1, max_workers} | {n for n in (2, 4, 8, 16, 32) if n < max_workers})
+    baseline = None
+    print(f"Parsing {len(pages)} pages ({sum(map(len, pages)) / 2**20:.1f} MiB)")
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(parse_quarterly_html, pages[:workers]))
+            start = t.perf_counter()
+            list(executor.map(parse_quarterly_html, pages, chunksize=4))
+            elapsed = t.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>3} workers: {elapsed:7.2f}s  {len(pages) / elapsed:8.1f} pages/s  "
+              f"speedup {baseline / elapsed:.2f}x")
+
+
+class IndicatorEngine:
+    """Vectorized technical indicators over a (date x ticker) price matrix.
+    
+    The full history is computed with rolling/ewm operations across all tickers
+    at once. The price matrices are kept between refreshes; when the ticker set
+    and newest date are unchanged only their last row is overwritten, the
+    recursive indicators (EMA, RSI, ATR) are advanced by one step from the
+    state of the previous bar and the window indicators are recomputed over
+    their trailing window only.
+    """
+    
+    FIELDS = ['Close', 'High', 'Low', 'Volume']
+    
+    DEFAULT_CONFIG = {
+        "sma_fast": 50,
+        "sma_slow": 200,
+        "ema_fast": 12,
+        "ema_slow": 26,
+        "rsi_period": 14,
+        "atr_period": 14,
+        "high_window": 252,
+        "volume_window": 20,
+        "rs_window": 63,
+        "benchmark": "^NSEI"
+    }
+    
+    def __init__(self, config=None):
+        self.config = dict(self.DEFAULT_CONFIG)
+        self.config.update(config or {})
+        
+        self.close = None
+        self.high = None
+        self.low = None
+        self.volume = None
+        self.benchmark = None
+        self.state = None
+        self.latest = pd.DataFrame(columns=self.headers())
+    
+    def headers(self):
+        c = self.config
+        return [
+            f"SMA {c['sma_fast']}/{c['sma_slow']}",
+            f"EMA {c['ema_fast']}/{c['ema_slow']}",
+            f"RSI {c['rsi_period']}",
+            f"ATR {c['atr_period']}",
+            "% From 52W High",
+            "Volume Surge",
+            f"RS vs {c['benchmark']}"
+        ]
+    
+    @staticmethod
+    def _daily_index(frame):
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.normalize()
+    
+    @staticmethod
+    def _last_date(hist):
+        last = pd.Timestamp(hist.index[-1])
+        if last.tz is not None:
+            last = last.tz_localize(None)
+        return last.normalize()
+    
+    def _matrices(self, histories):
+        fields = self.FIELDS
+        panel = pd.concat({ticker: hist[fields] for ticker, hist in histories.items()}, axis=1)
+        panel.index = self._daily_index(panel)
+        panel = panel.groupby(level=0).last()
+        
+        matrices = []
+        for name in fields:
+            sub = panel.xs(name, axis=1, level=1)
+            matrix = pd.DataFrame(sub.to_numpy(dtype=float), index=sub.index, columns=sub.columns)
+            # A ticker without a bar on a date (halted, or not yet traded today)
+            # carries its last prices forward, so every indicator reads the
+            # newest row. Volume is left missing rather than invented.
+            if name != 'Volume':
+                matrix = matrix.ffill()
+            matrices.append(matrix)
+        return matrices
+    
+    def update(self, histories, benchmark_hist=None):
+        """Refresh indicators from {ticker: OHLCV history}; returns one row per ticker"""
+        if not histories:
+            self.latest = pd.DataFrame(columns=self.headers())
+            return self.latest
+        
+        last_dates = [self._last_date(hist) if not hist.empty else None for hist in histories.values()]
+        if self._can_overwrite_last_bar(histories, last_dates):
+            self._overwrite_last_bar(histories, last_dates)
+            incremental = True
+        else:
+            self.close, self.high, self.low, self.volume = self._matrices(histories)
+            incremental = False
+        
+        self.benchmark = None
+        if benchmark_hist is not None and not benchmark_hist.empty:
+            benchmark = benchmark_hist['Close'].copy()
+            benchmark.index = self._daily_index(benchmark_hist)
+            benchmark = benchmark[~benchmark.index.duplicated(keep='last')]
+            self.benchmark = benchmark.reindex(self.close.index).ffill().astype(float)
+        
+        if incremental:
+            self.latest = self._compute_last_bar()
+        else:
+            self.latest = self._compute_full()
+        
+        return self.latest
+    
+    def _can_overwrite_last_bar(self, histories, last_dates):
+        """True when the ticker set and newest date match the kept matrices"""
+        if self.state is None or self.close is None or len(self.close) < 2 or None in last_dates:
+            return False
+        if list(histories) != list(self.close.columns):
+            return False
+        return max(last_dates) == self.close.index[-1]
+    
+    def _overwrite_last_bar(self, histories, last_dates):
+        newest = self.close.index[-1]
+        rows = np.full((len(histories), len(self.FIELDS)), np.nan)
+        for i, (hist, last_date) in enumerate(zip(histories.values(), last_dates)):
+            if last_date == newest:
+                rows[i] = [hist[name].iat[-1] for name in self.FIELDS]
+        
+        for k, matrix in enumerate((self.close, self.high, self.low, self.volume)):
+            values = rows[:, k]
+            if matrix is not self.volume:
+                # Same forward fill as _matrices for tickers without a bar on the newest date.
+                values = np.where(np.isnan(values), matrix.iloc[-2].to_numpy(), values)
+            matrix.iloc[-1] = values
+    
+    def _compute_full(self):
+        c = self.config
+        close, high, low = self.close, self.high, self.low
+        
+        ema_fast = close.ewm(span=c['ema_fast'], adjust=False).mean()
+        ema_slow = close.ewm(span=c['ema_slow'], adjust=False).mean()
+        
+        delta = close.diff()
+        rsi_alpha = 1.0 / c['rsi_period']
+        avg_gain = delta.clip(lower=0).ewm(alpha=rsi_alpha, adjust=False).mean()
+        avg_loss = (-delta).clip(lower=0).ewm(alpha=rsi_alpha, adjust=False).mean()
+        
+        true_range = self._true_range(high, low, close.shift(1)).fillna(high - low)
+        atr = true_range.ewm(alpha=1.0 / c['atr_period'], adjust=False).mean()
+        
+        sma_fast = close.rolling(c['sma_fast']).mean()
+        sma_slow = close.rolling(c['sma_slow']).mean()
+        
+        # Recursive state as of the second-to-last bar, so that a change to the
+        # last bar alone can be applied as a single step.
+        self.state = {
+            'ema_fast': ema_fast.iloc[-2],
+            'ema_slow': ema_slow.iloc[-2],
+            'avg_gain': avg_gain.iloc[-2],
+            'avg_loss': avg_loss.iloc[-2],
+            'atr': atr.iloc[-2],
+            'sma_trend': np.sign(sma_fast.iloc[-2] - sma_slow.iloc[-2]),
+            'ema_trend': np.sign(ema_fast.iloc[-2] - ema_slow.iloc[-2])
+        } if len(close) >= 2 else None
+        
+        return self._assemble(
+            sma_fast.iloc[-1], sma_slow.iloc[-1],
+            ema_fast.iloc[-1], ema_slow.iloc[-1],
+            avg_gain.iloc[-1], avg_loss.iloc[-1],
+            atr.iloc[-1]
+        )
+    
+    def _compute_last_bar(self):
+        c = self.config
+        s = self.state
+        close, high, low = self.close, self.high, self.low
+        last_close, prev_close = close.iloc[-1], close.iloc[-2]
+        
+        ema_fast = self._ewm_step(s['ema_fast'], last_close, 2.0 / (c['ema_fast'] + 1))
+        ema_slow = self._ewm_step(s['ema_slow'], last_close, 2.0 / (c['ema_slow'] + 1))
+        
+        delta = last_close - prev_close
+        rsi_alpha = 1.0 / c['rsi_period']
+        avg_gain = self._ewm_step(s['avg_gain'], delta.clip(lower=0), rsi_alpha)
+        avg_loss = self._ewm_step(s['avg_loss'], (-delta).clip(lower=0), rsi_alpha)
+        
+        last_high, last_low = high.iloc[-1], low.iloc[-1]
+        true_range = self._true_range(last_high, last_low, prev_close).fillna(last_high - last_low)
+        atr = self._ewm_step(s['atr'], true_range, 1.0 / c['atr_period'])
+        
+        sma_fast = self._trailing_mean(close, c['sma_fast'])
+        sma_slow = self._trailing_mean(close, c['sma_slow'])
+        
+        return self._assemble(sma_fast, sma_slow, ema_fast, ema_slow, avg_gain, avg_loss, atr)
+    
+    @staticmethod
+    def _ewm_step(previous, value, alpha):
+        """One ewm(adjust=False) step: starts at the first value and carries the previous value over a NaN"""
+        stepped = previous + alpha * (value - previous)
+        return stepped.where(value.notna(), previous).where(previous.notna(), value)
+    
+    @staticmethod
+    def _true_range(high, low, prev_close):
+        return np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+    
+    @staticmethod
+    def _trailing_mean(frame, window):
+        tail = frame.iloc[-window:]
+        mean = tail.mean()
+        return mean.where(tail.notna().sum() >= window)
+    
+    def _assemble(self, sma_fast, sma_slow, ema_fast, ema_slow, avg_gain, avg_loss, atr):
+        """Build the per-ticker output from last-bar values (window indicators use trailing slices)"""
+        c = self.config
+        close, high, volume = self.close, self.high, self.volume
+        last_close = close.iloc[-1]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = avg_gain / avg_loss
+            rsi = 100 - 100 / (1 + rs)
+        rsi = rsi.where(avg_loss != 0, 100.0)
+        
+        high_52w = high.iloc[-c['high_window']:].max()
+        from_high = (last_close / high_52w - 1) * 100
+        
+        # Volume is not forward-filled, so read each ticker's last traded volume.
+        window = c['volume_window']
+        avg_volume = volume.iloc[-window - 1:-1].mean()
+        volume_surge = (volume.iloc[-window - 1:].ffill().iloc[-1] / avg_volume).replace([np.inf, -np.inf], np.nan)
+        
+        rs_window = c['rs_window']
+        if self.benchmark is not None and len(close) > rs_window:
+            stock_return = last_close / close.iloc[-rs_window - 1]
+            bench_return = self.benchmark.iloc[-1] / self.benchmark.iloc[-rs_window - 1]
+            relative_strength = (stock_return / bench_return - 1) * 100
+        else:
+            relative_strength = pd.Series(np.nan, index=close.columns)
+        
+        sma_trend = np.sign(sma_fast - sma_slow)
+        ema_trend = np.sign(ema_fast - ema_slow)
+        prev_sma_trend = self.state['sma_trend'] if self.state else sma_trend
+        prev_ema_trend = self.state['ema_trend'] if self.state else ema_trend
+        
+        headers = self.headers()
+        return pd.DataFrame({
+            headers[0]: self._crossover_labels(sma_trend, prev_sma_trend),
+            headers[1]: self._crossover_labels(ema_trend, prev_ema_trend),
+            headers[2]: rsi,
+            headers[3]: atr,
+            headers[4]: from_high,
+            headers[5]: volume_surge,
+            headers[6]: relative_strength
+        }, index=close.columns)
+    
+    def _crossover_labels(self, trend, prev_trend):
+        labels = pd.Series('N/A', index=trend.index, dtype=object)
+        labels[trend > 0] = "Above"
+        labels[trend < 0] = "Below"
+        labels[(trend > 0) & (prev_trend <= 0)] = "Bullish Cross"
+        labels[(trend < 0) & (prev_trend >= 0)] = "Bearish Cross"
+        return labels
+
+
+class AlertRule:
+    """Fires when `column <op> threshold` becomes true; threshold may be a number or another column"""
+    
+    OPERATORS = {
+        ">": operator.gt,
+        ">=": operator.ge,
+        "<": operator.lt,
+        "<=": operator.le
+    }
+    
+    def __init__(self, name, column, op, threshold):
+        if op not in self.OPERATORS:
+            raise ValueError(f"Unsupported operator in alert rule {name}: {op}")
+        self.name = name
+        self.column = column
+        self.op = op
+        self.threshold = threshold
+        self.compare = self.OPERATORS[op]
+    
+    def columns(self):
+        if isinstance(self.threshold, str):
+            return [self.column, self.threshold]
+        return [self.column]
+    
+    def evaluate(self, row):
+        """True/False, or None when the inputs are missing or not numeric"""
+        value = row.get(self.column)
+        threshold = row.get(self.threshold) if isinstance(self.threshold, str) else self.threshold
+        try:
+            return self.compare(float(value), float(threshold))
+        except (TypeError, ValueError):
+            return None
+    
+    def describe(self, row):
+        threshold = self.threshold
+        if isinstance(threshold, str):
+            threshold = f"{threshold} ({row.get(threshold)})"
+        return f"{self.column} {row.get(self.column)} {self.op} {threshold}"
+
+
+class AlertEngine:
+    """Evaluates alert rules against the changes between consecutive rows of each ticker.
+    
+    Rules are indexed by the columns they read, so a refresh only evaluates the
+    rules touching a value that actually changed. A rule fires on the transition
+    from false to true, and a (ticker, rule) pair cannot fire again within the
+    cooldown. A global per-minute cap guards against a burst across tickers.
+    
+    Fired alerts are handed to the notifiers as one batch per refresh on a
+    worker thread, so a slow notifier never stalls the sheet update.
+    """
+    
+    DEFAULT_RULES = [
+        {"name": "52W High Breakout", "column": "CMP", "op": ">=", "threshold": "52W High"},
+        {"name": "Intraday Drop 5%", "column": "1D %", "op": "<=", "threshold": -5}
+    ]
+    
+    DEFAULT_NOTIFIERS = [{"type": "log"}]
+    
+    def __init__(self, rules, notifiers, cooldown=900, max_per_minute=20):
+        self.rules_by_column = defaultdict(list)
+        for rule in rules:
+            for column in rule.columns():
+                self.rules_by_column[column].append(rule)
+        self.notifiers = notifiers
+        self.cooldown = cooldown
+        self.max_per_minute = max_per_minute
+        
+        self.previous_rows = {}
+        self.rule_state = {}
+        self.last_fired = {}
+        self.recent_alerts = deque()
+        self.lock = threading.Lock()
+        
+        self.pending_batches = queue.Queue(maxsize=100)
+        threading.Thread(target=self._send_batches, daemon=True).start()
+    
+    @classmethod
+    def from_config(cls, config, root=None):
+        rules = []
+        names = set()
+        for rule in config.get("rules", cls.DEFAULT_RULES):
+            try:
+                if rule["name"] in names:
+                    raise ValueError(f"duplicate rule name {rule['name']}")
+                rules.append(AlertRule(rule["name"], rule["column"], rule["op"], rule["threshold"]))
+                names.add(rule["name"])
+            except (KeyError, ValueError) as e:
+                logger.error(f"Invalid alert rule {rule}: {e}")
+        
+        notifiers = []
+        for notifier in config.get("notifiers", cls.DEFAULT_NOTIFIERS):
+            kind = notifier.get("type")
+            if kind == "log":
+                notifiers.append(LogNotifier())
+            elif kind == "popup" and root is not None:
+                notifiers.append(PopupNotifier(root))
+            elif kind == "webhook" and notifier.get("url"):
+                notifiers.append(WebhookNotifier(notifier["url"], notifier.get("timeout", 5)))
+            elif kind == "file":
+                notifiers.append(FileNotifier(notifier.get("path", "stock_screener_alerts.log")))
+            else:
+                logger.error(f"Invalid alert notifier: {notifier}")
+        
+        return cls(rules, notifiers,
+                   cooldown=config.get("cooldown", 900),
+                   max_per_minute=config.get("max_per_minute", 20))
+    
+    def watched_columns(self):
+        return list(self.rules_by_column)
+    
+    def process(self, ticker, row):
+        """Compare row (at least the watched columns) with the previous row for ticker; returns the alerts that fire"""
+        now = t.time()
+        alerts = []
+        with self.lock:
+            previous = self.previous_rows.get(ticker, {})
+            self.previous_rows[ticker] = row
+            
+            # Only the columns some rule reads are compared.
+            rules = {}
+            for column, column_rules in self.rules_by_column.items():
+                if previous.get(column) != row.get(column):
+                    for rule in column_rules:
+                        rules[rule.name] = rule
+            
+            for rule in rules.values():
+                state = rule.evaluate(row)
+                if state is None:
+                    continue
+                key = (ticker, rule.name)
+                was_true = self.rule_state.get(key)
+                self.rule_state[key] = state
+                
+                # The first observation only establishes the baseline.
+                if not state or was_true is None or was_true:
+                    continue
+                if now - self.last_fired.get(key, float('-inf')) < self.cooldown:
+                    continue
+                if not self._within_rate_limit(now):
+                    logger.warning(f"Alert rate limit reached, dropping {rule.name} for {ticker}")
+                    continue
+                
+                self.last_fired[key] = now
+                alerts.append({
+                    "ticker": ticker,
+                    "rule": rule.name,
+                    "message": f"{ticker}: {rule.name} ({rule.describe(row)})",
+                    "time": datetime.now().isoformat(timespec='seconds')
+                })
+        
+        return alerts
+    
+    def dispatch(self, alerts):
+        """Queue one refresh's alerts for the notifiers"""
+        try:
+            self.pending_batches.put_nowait(list(alerts))
+        except queue.Full:
+            logger.warning(f"Alert queue full, dropping {len(alerts)} alerts")
+    
+    def _send_batches(self):
+        while True:
+            alerts = self.pending_batches.get()
+            for notifier in self.notifiers:
+                try:
+                    notifier.notify(alerts)
+                except Exception as e:
+                    logger.error(f"Error sending alerts via {type(notifier).__name__}: {e}")
+    
+    def _within_rate_limit(self, now):
+        while self.recent_alerts and now - self.recent_alerts[0] >= 60:
+            self.recent_alerts.popleft()
+        if len(self.recent_alerts) >= self.max_per_minute:
+            return False
+        self.recent_alerts.append(now)
+        return True
+
+
+class LogNotifier:
+    def notify(self, alerts):
+        for alert in alerts:
+            logger.warning(f"ALERT {alert['message']}")
+
+
+class PopupNotifier:
+    """Shows all alerts of one refresh in a single dialog"""
+    
+    def __init__(self, root):
+        self.root = root
+    
+    def notify(self, alerts):
+        title = f"Alert: {alerts[0]['rule']}" if len(alerts) == 1 else f"{len(alerts)} Alerts"
+        message = "\n".join(alert['message'] for alert in alerts)
+        self.root.after(0, lambda: messagebox.showwarning(title, message))
+
+
+class WebhookNotifier:
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+    
+    def notify(self, alerts):
+        response = requests.post(self.url, json=alerts, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class FileNotifier:
+    def __init__(self, path):
+        self.path = path
+    
+    def notify(self, alerts):
+        with open(self.path, "a") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + "\n")
 
 
 if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "--benchmark-parse":
+        benchmark_parsing(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None)
+        sys.exit(0)
+    
     root = tk.Tk()
     root.title("Stock Screener")
     